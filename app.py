@@ -4,13 +4,18 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import geopandas as gpd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import shapely
 import requests
 import folium
 from streamlit_folium import st_folium
-from shapely.geometry import Point
-from folium.plugins import MarkerCluster
+from folium.plugins import FastMarkerCluster
+import io
 import os
+import shutil
 import urllib.error
 
 st.set_page_config(page_title="DealScout LA", layout="wide")
@@ -25,9 +30,6 @@ if not uploaded:
     st.info("Upload a CSV to start.")
     st.stop()
 
-mls = pd.read_csv(uploaded)
-st.write(f"**{len(mls):,}** raw listings loaded")
-
 # ------------------------------------------------------------------
 # 2. Column indices (adjust if your CSV changes)
 # ------------------------------------------------------------------
@@ -37,47 +39,18 @@ lon_idx  = 254
 num_idx  = 522
 name_idx = 520
 suffix_idx = 523
-lot_idx  = mls.columns.get_loc("LotSizeSquareFeet")
-
-# ------------------------------------------------------------------
-# 3. Clean data
-# ------------------------------------------------------------------
-cols = [mls.columns[i] for i in (price_idx, lat_idx, lon_idx, num_idx, name_idx, suffix_idx, lot_idx)]
-mls = mls[cols].copy()
-
-mls["price"] = pd.to_numeric(mls.iloc[:, 0], errors="coerce")
-mls["lot_sqft"] = pd.to_numeric(mls.iloc[:, 6], errors="coerce")
-if "acres" in mls.columns[6].lower():
-    mls["lot_sqft"] *= 43560
-
-mls["lat"] = pd.to_numeric(mls.iloc[:, 1], errors="coerce")
-mls["lon"] = pd.to_numeric(mls.iloc[:, 2], errors="coerce")
-
-def clean(s):
-    return s.astype(str).str.strip().replace({"nan":"","NaN":"","None":""}, regex=False)
-
-mls["address"] = (
-    clean(mls.iloc[:, 3]) + " " +
-    clean(mls.iloc[:, 4]) + " " +
-    clean(mls.iloc[:, 5])
-).str.replace(r"\s+", " ", regex=True).str.strip()
-mls["address"] = mls["address"].replace("", "Unknown Address")
 
-mls = mls.dropna(subset=["price", "lot_sqft", "lat", "lon", "address"])
+# Canonical names for the columns above (+ LotSizeSquareFeet), applied right after parsing
+MLS_COLS = ["price", "lat", "lon", "num", "name", "suffix", "lot_sqft"]
 
 # ------------------------------------------------------------------
-# 4. Points → GeoDataFrame
-# ------------------------------------------------------------------
-mls["geometry"] = mls.apply(lambda r: Point(r.lon, r.lat), axis=1)
-gdf = gpd.GeoDataFrame(mls, geometry="geometry", crs="EPSG:4326")
-
-# ------------------------------------------------------------------
-# 5. LA CITY BOUNDARY – ROBUST (download + local cache)
+# 3. LA CITY BOUNDARY – ROBUST (download + local cache)
 # ------------------------------------------------------------------
 BOUNDARY_URL = "https://catalog.data.gov/dataset/3b6f4d16a9e34b9a8c5e4a27e8f5e6a7_0.geojson"
 CACHE_FILE   = "la_city_boundary_cache.geojson"
 
-@st.cache_data(show_spinner=False)
+# cache_resource so the prepared boundary isn't lost to pickling
+@st.cache_resource(show_spinner=False)
 def load_la_city_boundary():
     # 1. Try cached file first
     if os.path.exists(CACHE_FILE):
@@ -111,47 +84,64 @@ def _dissolve_boundary(gdf):
     if gdf.crs is None:
         gdf.set_crs("EPSG:4326", inplace=True)
     gdf = gdf.to_crs("EPSG:4326")
-    return gdf.dissolve().geometry.iloc[0]  # single polygon
-
-la_city_boundary = load_la_city_boundary()
-st.write("**LA City boundary ready**")
-
-# STRICT FILTER: Only points INSIDE LA City
-gdf_city = gdf[gdf.geometry.within(la_city_boundary)].copy()
-
-if gdf_city.empty:
-    st.error("**No MLS points inside LA City.**\n"
-             "Your CSV likely contains LA County, not just the City.\n"
-             "Tip: LA City lat ≈ 33.7–34.3, lon ≈ -118.6–-118.1")
-    st.stop()
-
-st.success(f"**{len(gdf_city):,}** points are **inside LA City**")
+    boundary = gdf.dissolve().geometry.iloc[0]  # single polygon
+    shapely.prepare(boundary)  # point-in-polygon fast path for contains_xy
+    return boundary
 
 # ------------------------------------------------------------------
-# 6. REAL LA CITY ZONING (cached from GitHub Release)
+# 4. REAL LA CITY ZONING (cached from GitHub Release)
 # ------------------------------------------------------------------
 ZONING_URL = "https://github.com/georgeandrewsc/dealscout-la/releases/download/v1.0-zoning/Zoning.geojson"
 
-@st.cache_data(show_spinner="Downloading zoning (440 MB)…", ttl=24*3600)
+ZONING_GEOJSON = "zoning_cache.geojson"
+ZONING_PARQUET = "zoning_cache.parquet"
+
+# cache_resource (not cache_data) so the prebuilt spatial index survives reruns
+@st.cache_resource(show_spinner="Downloading zoning (440 MB)…", ttl=24*3600)
 def load_zoning():
-    cache_file = "zoning_cache.geojson"
-    if os.path.exists(cache_file):
+    # The processed layer (ZONE_CLASS + dissolved polygons) is kept as GeoParquet:
+    # a columnar read, no GeoJSON parse or dissolve on later cold starts
+    if os.path.exists(ZONING_PARQUET):
         try:
-            gdf = gpd.read_file(cache_file)
+            gdf = gpd.read_parquet(ZONING_PARQUET)
             st.write("**Using cached zoning file**")
-            return _fix_zoning_gdf(gdf)
+            return _index_zoning(gdf)
+        except Exception as e:
+            st.warning(f"Parquet cache corrupt ({e}), rebuilding...")
+    gdf = _fix_zoning_gdf(_read_raw_zoning())
+    try:
+        gdf.to_parquet(ZONING_PARQUET, compression="zstd")
+        # The parquet supersedes the raw download; don't keep 440 MB of GeoJSON around
+        if os.path.exists(ZONING_GEOJSON):
+            os.remove(ZONING_GEOJSON)
+    except Exception as e:
+        st.warning(f"Could not cache zoning as GeoParquet ({e})")
+    return _index_zoning(gdf)
+
+def _index_zoning(gdf):
+    gdf.sindex  # build the STRtree once, reused by every lookup
+    # Prepared polygons make the point tests after the bbox query cheap;
+    # held by cache_resource, so this is paid once per process
+    shapely.prepare(gdf.geometry.values)
+    return gdf
+
+def _read_raw_zoning():
+    if os.path.exists(ZONING_GEOJSON):
+        try:
+            gdf = gpd.read_file(ZONING_GEOJSON)
+            st.write("**Using cached zoning GeoJSON**")
+            return gdf
         except Exception as e:
             st.warning(f"Cache corrupt ({e}), redownloading...")
     try:
         with requests.get(ZONING_URL, stream=True, timeout=600) as r:
             r.raise_for_status()
             total = int(r.headers.get('content-length', 0))
+            r.raw.decode_content = True  # undo gzip/deflate, as iter_content did
             with st.spinner(f"Downloading {total/1e6:.1f} MB…"):
-                with open(cache_file, "wb") as f:
-                    for chunk in r.iter_content(8192):
-                        f.write(chunk)
-        gdf = gpd.read_file(cache_file)
-        return _fix_zoning_gdf(gdf)
+                with open(ZONING_GEOJSON, "wb") as f:
+                    shutil.copyfileobj(r.raw, f, length=1 << 20)  # 1 MiB blocks, ~440 writes
+        return gpd.read_file(ZONING_GEOJSON)
     except Exception as e:
         st.error(f"Failed to load zoning file: {e}")
         st.stop()
@@ -166,29 +156,20 @@ def _fix_zoning_gdf(gdf):
         st.stop()
     zone_col = cols[0]
     st.write(f"**Using zoning column:** `{zone_col}`")
-    gdf["ZONE_CLASS"] = gdf[zone_col].astype(str)
-    return gdf[["ZONE_CLASS", "geometry"]].copy()
-
-zoning = load_zoning()
-st.success(f"**REAL Zoning loaded:** {len(zoning):,} polygons")
-
-# ------------------------------------------------------------------
-# 7. Join city-filtered points with zoning (strict intersects)
-# ------------------------------------------------------------------
-gdf_la = gpd.sjoin(gdf_city, zoning, how="inner", predicate="intersects")
-gdf_la = gdf_la.loc[:, ~gdf_la.columns.duplicated()].reset_index(drop=True)
-
-if gdf_la.empty:
-    st.error("No points intersect zoning polygons. Check lat/lon.")
-    st.stop()
-
-st.success(f"**{len(gdf_la):,}** points have a zoning code")
-
-la_city = gdf_la.copy()
-la_city["Zoning"] = la_city["ZONE_CLASS"]
+    # pandas 3's astype(str) keeps nulls as NaN, and dissolve would drop those
+    # polygons (and every listing inside them); keep them as the old "nan" class
+    gdf["ZONE_CLASS"] = gdf[zone_col].astype(str).fillna("nan")
+    gdf = gdf[["ZONE_CLASS", "geometry"]].copy()
+    # Merge adjacent same-class parcels, then split back into contiguous
+    # pieces so the STRtree keeps tight bounding boxes
+    try:
+        gdf = gdf.dissolve(by="ZONE_CLASS", as_index=False).explode(ignore_index=True)
+    except Exception as e:
+        st.warning(f"Zoning dissolve failed ({e}), using raw polygons.")
+    return gdf
 
 # ------------------------------------------------------------------
-# 8. sqft_map + unit calculations
+# 5. sqft_map + listing cleanup
 # ------------------------------------------------------------------
 sqft_map = {
     'CM':800, 'C1':800, 'C2':400, 'C4':400, 'C5':400,
@@ -200,62 +181,244 @@ sqft_map = {
     'RMP':20000, 'MR1':400, 'M1':400, 'MR2':200, 'M2':200,
     'A1':108900, 'A2':43560
 }
-la_city["base"] = la_city["Zoning"].str.replace(r'[\[\](Q)F].*', '', regex=True).str.split("-").str[0].str.upper()
-la_city["sqft_per"] = la_city["base"].map(sqft_map).fillna(5000)
-la_city["max_units"] = (la_city["lot_sqft"] / la_city["sqft_per"]).clip(lower=1).apply(lambda x: min(x, 20))
+# Frozen lookup: zone position → sqft per unit. Zones not in sqft_map come back
+# from get_indexer as -1, which indexes the trailing 5000 default.
+SQFT_ZONES = pd.Index(list(sqft_map))
+SQFT_PER = np.array(list(sqft_map.values()) + [5000], dtype=float)
+
+# Zoning strings are cut at the first qualifier character before the base zone is taken
+# (a str for the same reason as _NULL_PART_PAT below: categories are Arrow strings)
+_QUALIFIER_PAT = r"[\[\](Q)F].*"
+
+# Blank out missing / null-token parts in one regex pass; stray whitespace in
+# real values is collapsed once on the joined address
+# (a str, not a compiled re.Pattern: Arrow strings send compiled patterns to Python's re)
+_NULL_PART_PAT = r"^\s*(?:nan|NaN|None|<NA>)?\s*$"
+
+def clean(s):
+    return s.astype("string[pyarrow]").str.replace(_NULL_PART_PAT, "", regex=True).fillna("")
+
+def _numify(s):
+    # the pyarrow parser usually types these already; only text columns need coercing
+    return s if pd.api.types.is_numeric_dtype(s) else pd.to_numeric(s, errors="coerce")
+
+def _read_mls_arrow(csv_bytes, n_cols, col_idx):
+    # Arrow's multithreaded parser. Columns are picked by position under
+    # synthetic names, so repeated header names can't break the selection;
+    # numeric columns are read as float64 (never int, so blanks stay NaN)
+    names = [f"c{i}" for i in range(n_cols)]
+    keep = [names[i] for i in col_idx]
+    types = {
+        "price": pa.float64(), "lat": pa.float64(), "lon": pa.float64(),
+        "num": pa.string(), "name": pa.string(), "suffix": pa.string(),
+        "lot_sqft": pa.float64(),
+    }
+    table = pa_csv.read_csv(
+        io.BytesIO(csv_bytes),
+        read_options=pa_csv.ReadOptions(column_names=names, skip_rows=1),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=keep, column_types={k: types[c] for k, c in zip(keep, MLS_COLS)}, strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas().rename(columns=dict(zip(keep, MLS_COLS)))
 
-r1 = la_city["base"] == "R1"
-la_city.loc[r1, "max_units"] = la_city.loc[r1, "lot_sqft"].apply(
-    lambda x: 4 if x >= 2400 else 3 if x >= 1000 else 2
-)
-la_city["price_per_unit"] = (la_city["price"] / la_city["max_units"]).round(0).astype(int)
+def _prep_listings(mls):
+    for c in ["price", "lot_sqft", "lat", "lon"]:
+        mls[c] = _numify(mls[c])
+
+    address = clean(mls["num"]).str.cat([clean(mls["name"]), clean(mls["suffix"])], sep=" ", na_rep="")
+    # Arrow string kernels: a single RE2 pass to collapse whitespace beats split/join
+    address = address.str.replace(r"\s+", " ", regex=True).str.strip()
+    mls["address"] = address.mask(address.eq(""), "Unknown Address")
+
+    mls = mls.dropna(subset=["price", "lot_sqft", "lat", "lon"])
+    return mls[["price", "lot_sqft", "lat", "lon", "address"]]
 
 # ------------------------------------------------------------------
-# 9. Filter by max $/unit
+# 6. CSV → cleaned points → LA City → zoning → units
+#    Cached on the upload bytes; the slider lives in the step 8 fragment,
+#    so moving it never re-enters this function. Bounded like the step 7
+#    caches so old uploads don't pile up. The boundary and zoning come in
+#    unhashed (leading underscore): they are cache_resource objects, loaded
+#    outside so their status messages aren't replayed with every cache hit.
 # ------------------------------------------------------------------
-max_ppu = st.sidebar.slider("Max $/unit", 0, 1_000_000, 300_000, 25_000)
-filtered = la_city[la_city["price_per_unit"] <= max_ppu].copy()
+@st.cache_data(show_spinner="Processing listings…", max_entries=16)
+def build_deals(csv_bytes, _la_city_boundary, _zoning):
+    # Parse only the 7 columns we use; MLS exports are 500+ columns wide
+    header = pd.read_csv(io.BytesIO(csv_bytes), nrows=0)
+    lot_idx = header.columns.get_loc("LotSizeSquareFeet")
+    col_idx = [price_idx, lat_idx, lon_idx, num_idx, name_idx, suffix_idx, lot_idx]
+    try:
+        mls = _read_mls_arrow(csv_bytes, len(header.columns), col_idx)
+    except (pa.ArrowException, ValueError):
+        # e.g. "$1,200,000" in a numeric column: the C engine + to_numeric coerce it
+        cols = [header.columns[i] for i in col_idx]
+        mls = pd.read_csv(
+            io.BytesIO(csv_bytes), usecols=col_idx, dtype={c: "string[pyarrow]" for c in cols[3:6]},
+        )
+        mls = mls.rename(columns=dict(zip(cols, MLS_COLS)))
+    n_raw = len(mls)
+    mls = _prep_listings(mls)
+    st.write(f"**{n_raw:,}** raw listings loaded")
+
+    # Drop exact repeats only (same address, spot, price and lot): units in one
+    # building share an address and coordinate but are separate listings
+    key = pd.util.hash_pandas_object(
+        pd.concat([mls["address"], mls["lat"].round(6), mls["lon"].round(6), mls["price"], mls["lot_sqft"]], axis=1),
+        index=False,
+    )
+    dup = key.duplicated().to_numpy()
+    if dup.any():
+        mls = mls[~dup]
+        st.write(f"**{dup.sum():,}** duplicate listings dropped")
+
+    # STRICT FILTER: Only points INSIDE LA City
+    # cheap bbox prefilter first, so only nearby points pay for the polygon test,
+    # which runs straight on the lon/lat arrays against the prepared boundary
+    # (mask refined in place, so the frame is sliced once)
+    minx, miny, maxx, maxy = _la_city_boundary.bounds
+    lon, lat = mls["lon"].to_numpy(), mls["lat"].to_numpy()
+    in_city = (lon >= minx) & (lon <= maxx) & (lat >= miny) & (lat <= maxy)
+    in_city[in_city] = shapely.contains_xy(_la_city_boundary, lon[in_city], lat[in_city])
+    mls_city = mls[in_city]
+
+    if mls_city.empty:
+        st.error("**No MLS points inside LA City.**\n"
+                 "Your CSV likely contains LA County, not just the City.\n"
+                 "Tip: LA City lat ≈ 33.7–34.3, lon ≈ -118.6–-118.1")
+        st.stop()
+
+    st.success(f"**{len(mls_city):,}** points are **inside LA City**")
+
+    # Join city-filtered points with zoning (strict intersects)
+    # Bulk-query the cached STRtree directly: we only need one label per point,
+    # not sjoin's merged frame. Points on a zone edge keep their first hit.
+    # Distinct listings can share a coordinate (units in one building); each
+    # coordinate is looked up once and its label broadcast to all of them.
+    xy, inverse = np.unique(mls_city[["lon", "lat"]].to_numpy(), axis=0, return_inverse=True)
+    points = gpd.points_from_xy(xy[:, 0], xy[:, 1], crs="EPSG:4326")
+    # bbox candidates from the tree, then the exact test against the prepared
+    # polygons (a predicate query would prepare the points instead)
+    pt_idx, zone_idx = _zoning.sindex.query(points)
+    hit = shapely.intersects_xy(_zoning.geometry.values[zone_idx], xy[pt_idx, 0], xy[pt_idx, 1])
+    pt_idx, zone_idx = pt_idx[hit], zone_idx[hit]
+    pt_idx, first = np.unique(pt_idx, return_index=True)
+    zone_of = np.full(len(xy), -1)
+    zone_of[pt_idx] = zone_idx[first]
+    zone_of = zone_of[inverse.reshape(-1)]
+    matched = zone_of >= 0
+
+    if not matched.any():
+        st.error("No points intersect zoning polygons. Check lat/lon.")
+        st.stop()
+
+    la_city = mls_city[matched].reset_index(drop=True)
+    la_city["Zoning"] = _zoning["ZONE_CLASS"].to_numpy()[zone_of[matched]]
+    st.success(f"**{len(la_city):,}** points have a zoning code")
+
+    # Parse each distinct zoning string once, then broadcast back by category code.
+    zoning_cat = la_city["Zoning"].astype("category")
+    codes = zoning_cat.cat.codes.to_numpy()
+    base = zoning_cat.cat.categories.str.replace(_QUALIFIER_PAT, "", regex=True).str.split("-", n=1).str[0].str.upper()
+    sqft_per = SQFT_PER[SQFT_ZONES.get_indexer(base)][codes]
+
+    # R1 lots get the SB-9 tiers; everything else is lot / sqft_per, clamped to 1–20
+    lot = la_city["lot_sqft"].to_numpy()
+    r1 = (base == "R1")[codes]
+    max_units = np.where(
+        r1,
+        np.select([lot >= 2400, lot >= 1000], [4, 3], default=2),
+        np.clip(lot / sqft_per, 1, 20),
+    )
+    la_city["max_units"] = max_units
+    la_city["price_per_unit"] = np.rint(la_city["price"].to_numpy() / max_units).astype(np.int64)
+    # Plain frame (no shapely geometry) keeps the cache cheap to pickle;
+    # the lat/lon columns carry the location. lot_sqft is dropped so slider
+    # reruns only touch what they show.
+    return la_city[["address", "price", "price_per_unit", "max_units", "Zoning", "lat", "lon"]]
+
+la_city_boundary = load_la_city_boundary()
+st.write("**LA City boundary ready**")
+zoning = load_zoning()
+st.success(f"**REAL Zoning loaded:** {len(zoning):,} polygons")
+
+la_city = build_deals(uploaded.getvalue(), la_city_boundary, zoning)
 
 # ------------------------------------------------------------------
-# 10. Final map of deals
+# 7. Map + CSV builders
 # ------------------------------------------------------------------
-if not filtered.empty:
-    m = folium.Map([34.05, -118.24], zoom_start=11, tiles="CartoDB positron")
-    cluster = MarkerCluster().add_to(m)
-    for _, r in filtered.iterrows():
-        color = "lime" if r.price_per_unit < 200_000 else "orange" if r.price_per_unit < 400_000 else "red"
-        folium.CircleMarker(
-            [r.geometry.y, r.geometry.x],
-            radius=6, color=color, fill=True,
-            popup=folium.Popup(
-                f"<b>{r.address}</b><br>"
-                f"Price: ${r.price:,.0f}<br>"
-                f"$/Unit: ${r.price_per_unit:,.0f}<br>"
-                f"Max Units: {r.max_units:.0f}<br>"
-                f"Zoning: {r.Zoning}",
-                max_width=300
-            )
-        ).add_to(cluster)
-    st.subheader("LA City Deals Map")
-    st_folium(m, width=1200, height=600, key="final_deals")
-else:
-    st.warning("No deals under the selected $/unit threshold.")
+# row = [lat, lon, color, popup_html]
+DEAL_MARKER_JS = """
+function (row) {
+    return L.circleMarker(new L.LatLng(row[0], row[1]), {radius: 6, color: row[2], fill: true})
+        .bindPopup(row[3], {maxWidth: 300});
+}
+"""
+
+# Keyed on the filtered deals, so reruns that don't change the filter reuse the
+# marker rows. Only the picklable rows are cached: st_folium renders the map,
+# and rendering appends scripts to it, so a shared folium.Map would grow per rerun.
+@st.cache_data(show_spinner=False, max_entries=16)
+def deal_marker_rows(filtered):
+    ppu_arr = filtered["price_per_unit"].to_numpy()
+    colors = np.select([ppu_arr < 200_000, ppu_arr < 400_000], ["lime", "orange"], default="red")
+    popups = (
+        "<b>" + filtered["address"] + "</b><br>"
+        + "Price: $" + filtered["price"].map("{:,.0f}".format) + "<br>"
+        + "$/Unit: $" + filtered["price_per_unit"].map("{:,}".format) + "<br>"
+        + "Max Units: " + filtered["max_units"].round().astype(int).astype(str) + "<br>"
+        + "Zoning: " + filtered["Zoning"]
+    )
+    return list(zip(filtered["lat"].tolist(), filtered["lon"].tolist(), colors.tolist(), popups.tolist()))
+
+def build_deals_map(filtered):
+    m = folium.Map([34.05, -118.24], zoom_start=11, tiles="CartoDB positron", prefer_canvas=True)
+    # One JS array + client-side callback instead of a Python CircleMarker per deal
+    FastMarkerCluster(deal_marker_rows(filtered), callback=DEAL_MARKER_JS).add_to(m)
+    return m
+
+# Plain numeric columns (Excel/Sheets format currency themselves); the bytes
+# are cached so reruns that don't change the filter skip serialization;
+# bounded like the marker cache so old slider positions don't pile up
+@st.cache_data(show_spinner=False, max_entries=16)
+def to_csv_bytes(dl):
+    return dl.to_csv(index=False).encode()
 
 # ------------------------------------------------------------------
-# 11. Download CSV
+# 8. Filter by max $/unit → map → download
+#    A fragment: moving the slider reruns only this block, not the script.
+#    Fragments can't write to the sidebar, so the slider lives in the body.
 # ------------------------------------------------------------------
-if not filtered.empty:
-    dl = filtered[["address","price","price_per_unit","max_units","Zoning"]].copy()
-    dl.columns = ["Address","Price","$ per Unit","Max Units","Zoning"]
-    dl["Price"] = dl["Price"].apply(lambda x: f"${x:,.0f}")
-    dl["$ per Unit"] = dl["$ per Unit"].apply(lambda x: f"${x:,.0f}")
+@st.fragment
+def show_deals(la_city):
+    max_ppu = st.slider("Max $/unit", 0, 1_000_000, 300_000, 25_000)
+    filtered = la_city[la_city["price_per_unit"].to_numpy() <= max_ppu]
+
+    if filtered.empty:
+        st.warning("No deals under the selected $/unit threshold.")
+        st.info("No data to download at current filter.")
+        return
+
+    st.subheader("LA City Deals Map")
+    # Display only: returned_objects=[] stops pan/zoom/click state from being sent
+    # back to Python, which would otherwise rerun this fragment per interaction
+    st_folium(build_deals_map(filtered), width=1200, height=600, key="final_deals", returned_objects=[])
+
+    dl = pd.DataFrame({
+        "Address": filtered["address"],
+        "Price": filtered["price"].round().astype(int),
+        "$ per Unit": filtered["price_per_unit"],
+        "Max Units": filtered["max_units"],
+        "Zoning": filtered["Zoning"],
+    })
     st.download_button(
         "Download CSV",
-        dl.to_csv(index=False),
+        to_csv_bytes(dl),
         "LA_Deals.csv",
         "text/csv"
     )
-else:
-    st.info("No data to download at current filter.")
+
+show_deals(la_city)
 
 st.success("**LIVE!** Using **cached LA City boundary** + **real zoning**.")